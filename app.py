@@ -2,6 +2,7 @@
 
 import pandas as pd
 import os, sys
+import concurrent.futures
 from recon.matcher import match
 from recon.rules import compute_findings
 from recon.summarizer import summarize_report
@@ -10,8 +11,8 @@ from recon.integrators import publish_recon_report
 def main():
     # 1. Load Data
     try:
-        bank = pd.read_csv("data/landlord_bank_transactions.csv")
-        inv  = pd.read_csv("data/rent_ledger.csv")
+        bank = pd.read_csv("data/landlord_bank_transactions.csv", engine="pyarrow")
+        inv  = pd.read_csv("data/rent_ledger.csv", engine="pyarrow")
     except Exception as e:
         print(f"Error loading data: {e}")
         return
@@ -23,18 +24,8 @@ def main():
     
     # 3. Strict Rules (The Fix)
     try:
-        # compute_findings returns strict logical findings (e.g. exact duplicates)
-        strict_findings = compute_findings(matches, bank_unmatched, inv_unmatched)
-        
-        # Merge strict findings into general findings
-        # We prioritize strict findings if the fuzzy matcher returned empty/None for that key
-        for k, v in strict_findings.items():
-            existing = findings.get(k)
-            # If key missing in findings OR existing is empty dataframe, take the strict one
-            if k not in findings:
-                findings[k] = v
-            elif isinstance(existing, pd.DataFrame) and existing.empty and not v.empty:
-                findings[k] = v
+        # compute_findings adds strict logical findings (e.g. exact duplicates) to the matcher's findings
+        findings = compute_findings(matches, bank_unmatched, inv_unmatched, findings)
                 
     except Exception as e:
         print(f"Warning: Rules engine failed: {e}")
@@ -51,8 +42,8 @@ def main():
     summary = summarize_report(stats)
     print("\n" + "="*50 + "\n" + summary + "\n" + "="*50)
 
-    # 5. Publish
-    publish_recon_report(matches, bank_unmatched, inv_unmatched, summary)
+    # 5. Publish (runs in the background; wait so the CLI doesn't exit mid-write)
+    concurrent.futures.wait(publish_recon_report(matches, bank_unmatched, inv_unmatched, summary))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
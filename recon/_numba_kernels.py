@@ -0,0 +1,35 @@
+# recon/_numba_kernels.py
+
+import numpy as np
+
+# Optional JIT path for the fuzzy-match candidate filter. numba is not a hard requirement:
+# without it (or for small candidate sets, where compile time would dominate) the NumPy version is used.
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+# Below this many candidate pairs vectorized NumPy is already fast enough
+NUMBA_MIN_PAIRS = 50_000
+
+def _amount_date_filter_numpy(b_amt, i_amt, b_days, i_days, idx_pairs, tol, window):
+    i, j = idx_pairs[:, 0], idx_pairs[:, 1]
+    # NaN day differences (unknown dates) compare False, so they pass the window check
+    return (np.abs(b_amt[i] - i_amt[j]) < tol) & ~(np.abs(b_days[i] - i_days[j]) > window)
+
+if HAVE_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _amount_date_filter_numba(b_amt, i_amt, b_days, i_days, idx_pairs, tol, window, out_mask):
+        for p in prange(len(idx_pairs)):
+            i, j = idx_pairs[p, 0], idx_pairs[p, 1]
+            out_mask[p] = abs(b_amt[i] - i_amt[j]) < tol and not (abs(b_days[i] - i_days[j]) > window)
+
+def amount_date_filter(b_amt, i_amt, b_days, i_days, idx_pairs, tol=0.05, window=5):
+    """Boolean mask over (bank, invoice) index pairs: amounts within tol and dates at most window days apart."""
+    idx_pairs = np.ascontiguousarray(idx_pairs, dtype=np.int64)
+    if HAVE_NUMBA and len(idx_pairs) >= NUMBA_MIN_PAIRS:
+        out_mask = np.empty(len(idx_pairs), dtype=np.bool_)
+        _amount_date_filter_numba(b_amt, i_amt, b_days, i_days, idx_pairs, float(tol), float(window), out_mask)
+        return out_mask
+    return _amount_date_filter_numpy(b_amt, i_amt, b_days, i_days, idx_pairs, tol, window)
\ No newline at end of file
@@ -1,27 +1,65 @@
 # recon/integrators.py
 
 import os
+import concurrent.futures
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# Background pool for publishing, so callers (the Streamlit UI) don't block on disk/network I/O
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+# Shared HTTP session: keep-alive reuses the TLS connection across publishes.
+# Retries cover connection failures and 429/5xx; read=0 so a slow webhook is never posted twice.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.3,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"POST"}))
+))
+
 def export_csv(df, filename):
     path = os.path.join("reports", filename)
     os.makedirs("reports", exist_ok=True)
+    if pa is not None:
+        try:
+            # Fast path: Arrow's C++ writer, straight to the file
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pacsv.write_csv(table, path)
+            return path
+        except (pa.ArrowException, TypeError, ValueError):
+            # Mixed-type object columns can't always be converted; use pandas instead
+            pass
     df.to_csv(path, index=False)
     return path
 
 def send_slack_message(msg):
     url = os.environ.get("SLACK_WEBHOOK_URL")
     if url:
-        requests.post(url, json={"text": msg})
+        _SESSION.post(url, json={"text": msg}, timeout=5)
         print("Slack sent.")
     else:
         print("Slack skipped (no URL).")
 
+def _log_publish_error(future):
+    if future.exception() is not None:
+        print(f"Publish error: {future.exception()}")
+
 def publish_recon_report(matches, un_txns, un_invs, summary):
-    try:
-        export_csv(matches, "matches.csv")
-        export_csv(un_txns, "unmatched_txns.csv")
-        send_slack_message(summary)
-    except Exception as e:
-        print(f"Publish error: {e}")
\ No newline at end of file
+    """Fire-and-forget publish. Returns the futures so callers can check for errors later."""
+    futures = [
+        _EXECUTOR.submit(export_csv, matches, "matches.csv"),
+        _EXECUTOR.submit(export_csv, un_txns, "unmatched_txns.csv"),
+        _EXECUTOR.submit(send_slack_message, summary),
+    ]
+    for f in futures:
+        f.add_done_callback(_log_publish_error)
+    return futures
\ No newline at end of file
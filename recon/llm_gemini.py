@@ -2,7 +2,9 @@
 
 import os
 import time
-from typing import Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Iterator, Optional
 import pandas as pd
 import google.genai as genai
 from google.genai import types
@@ -19,6 +21,12 @@ def _retry_call(fn, retries=2, backoff_base=0.6):
             time.sleep(backoff_base * attempt)
     raise last_exc
 
+# Pulls a column out as a plain array (missing column or values -> default) so prompt lines don't touch pandas per row.
+def _column(df: pd.DataFrame, name: str, default: Any):
+    if name not in df.columns:
+        return [default] * len(df)
+    return df[name].astype(object).where(df[name].notna(), default).to_numpy()
+
 # Builds the prompt for Gemini using the structured stats format from summarizer.py. 
 # It includes counts and sample data for unmatched transactions and invoices.
 def _build_prompt(stats: Dict[str, Any]) -> str:
@@ -31,12 +39,13 @@ def _build_prompt(stats: Dict[str, Any]) -> str:
     partials_list = raw.get("findings", {}).get("partials", [])
 
     # 1. Unpaid Invoices
-    unpaid_inv_lines = []
     if not unmatched_invs.empty:
-        for _, i in unmatched_invs.iterrows():
-            unpaid_inv_lines.append(f"- Tenant: {i.get('customer','N/A')}, Amount Due: R{i.get('amount','N/A'):.2f}, Ref: {i.get('reference','')}")
+        customers = _column(unmatched_invs, 'customer', 'N/A')
+        amounts = unmatched_invs['amount'].to_numpy(dtype=float, na_value=float('nan'))
+        refs = _column(unmatched_invs, 'reference', '')
+        unpaid_inv_lines = [f"- Tenant: {c}, Amount Due: R{a:.2f}, Ref: {r}" for c, a, r in zip(customers, amounts, refs)]
     else:
-        unpaid_inv_lines.append("- All expected rent payments have been matched.")
+        unpaid_inv_lines = ["- All expected rent payments have been matched."]
 
     # 2. Shortfalls
     partial_lines = []
@@ -47,12 +56,13 @@ def _build_prompt(stats: Dict[str, Any]) -> str:
         partial_lines.append("- No short/partial payments detected.")
 
     # 3. Mystery Payments
-    mystery_txn_lines = []
     if not unmatched_txns.empty:
-        for _, t in unmatched_txns.iterrows():
-            mystery_txn_lines.append(f"- TXN {t.get('txn_id')}: R{t.get('amount'):.2f}, Desc: {t.get('description','').strip()[:40]}...")
+        txn_ids = _column(unmatched_txns, 'txn_id', None)
+        amounts = unmatched_txns['amount'].to_numpy(dtype=float, na_value=float('nan'))
+        descs = _column(unmatched_txns, 'description', '')
+        mystery_txn_lines = [f"- TXN {t}: R{a:.2f}, Desc: {str(d).strip()[:40]}..." for t, a, d in zip(txn_ids, amounts, descs)]
     else:
-        mystery_txn_lines.append("- No mystery or extra payments to investigate.")
+        mystery_txn_lines = ["- No mystery or extra payments to investigate."]
 
     prompt_parts = [
         "You are a **Landlord Operations Assistant** in South Africa.",
@@ -80,6 +90,92 @@ def _build_prompt(stats: Dict[str, Any]) -> str:
     
     return "\n".join(prompt_parts)
 
+# Fuzzy cache key: runs that differ by a transaction or two should reuse the same plan.
+# Counts are rounded to the nearest 5. The sample rows are the exact ones _build_prompt renders (first 3 per side,
+# every partial), reduced to a (tenant/description/invoice, R100 amount band) pair, so a cached plan never names
+# tenants or shortfalls that aren't in the current run.
+def _fuzzy_key(stats: Dict[str, Any]) -> Tuple:
+    counts = stats.get("counts", {})
+    raw = stats.get("raw", {})
+
+    def bucket(n):
+        return 5 * round((n or 0) / 5)
+
+    def band(amt):
+        return int(round(float(amt), -2)) if amt is not None and pd.notna(amt) else None
+
+    def sample_rows(df, label_col):
+        if df is None or df.empty:
+            return ()
+        sample = df.head(3)
+        labels = sample.get(label_col, pd.Series("", index=sample.index))
+        labels = labels.fillna("").astype(str).str.lower().str.strip().str[:40]
+        amounts = sample.get("amount", pd.Series(None, index=sample.index, dtype=float))
+        return tuple((label, band(amt)) for label, amt in zip(labels, amounts))
+
+    partials = tuple(
+        (str(p.get("invoice_id")), band(p.get("received_total")))
+        for p in raw.get("findings", {}).get("partials", [])
+    )
+
+    return (
+        bucket(counts.get("matches")),
+        bucket(counts.get("unmatched_inv")),
+        bucket(counts.get("unmatched_txn")),
+        partials,
+        sample_rows(raw.get("unmatched_invs"), "customer"),
+        sample_rows(raw.get("unmatched_txns"), "description"),
+    )
+
+# Cached Gemini call (LRU, 100 entries). Exceptions are not cached, so a failed call is retried on the next run.
+# Streamlit sessions run on separate threads and share this module, so every cache access holds the lock.
+_PLAN_CACHE: "OrderedDict[Tuple, str]" = OrderedDict()
+_PLAN_CACHE_SIZE = 100
+_PLAN_CACHE_LOCK = threading.Lock()
+
+def _cache_get(cache_key: Tuple) -> Optional[str]:
+    with _PLAN_CACHE_LOCK:
+        if cache_key in _PLAN_CACHE:
+            _PLAN_CACHE.move_to_end(cache_key)
+            return _PLAN_CACHE[cache_key]
+        return None
+
+def _cache_put(cache_key: Tuple, text: str) -> None:
+    # Empty/blocked responses are not cached; an empty string would otherwise count as a hit
+    if not text:
+        return
+    with _PLAN_CACHE_LOCK:
+        _PLAN_CACHE[cache_key] = text
+        if len(_PLAN_CACHE) > _PLAN_CACHE_SIZE:
+            _PLAN_CACHE.popitem(last=False)
+
+def _generation_config():
+    return types.GenerateContentConfig(
+        max_output_tokens=800,
+        temperature=0.4
+    )
+
+def _call_gemini_cached(key: Tuple, prompt: str, model: str) -> str:
+    cache_key = (key, model)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+
+    def call_gemini():
+        # Corrected call using the config object for new SDK
+        resp = client.models.generate_content(
+            model=model, 
+            contents=prompt, 
+            config=_generation_config()
+        )
+        return resp.text
+
+    text = _retry_call(call_gemini, retries=2)
+    _cache_put(cache_key, text)
+    return text
+
 # Main function to call Gemini and get the action plan. It handles API key retrieval, error handling, and retries.
 def generate_action_plan_with_gemini(
     stats: Dict[str, Any],
@@ -93,27 +189,47 @@ def generate_action_plan_with_gemini(
         return get_local_fallback()
     
     try:
-        client = genai.Client(api_key=api_key)
         prompt = _build_prompt(stats)
-        
-        def call_gemini():
-            # Corrected call using the config object for new SDK
-            resp = client.models.generate_content(
-                model=model, 
-                contents=prompt, 
-                config=types.GenerateContentConfig(
-                    max_output_tokens=800,
-                    temperature=0.4
-                )
-            )
-            return resp.text
-    
-        return _retry_call(call_gemini, retries=2)
+        return _call_gemini_cached(_fuzzy_key(stats), prompt, model)
     
     except Exception as e:
         print(f"[Gemini Error] {e}")
         return get_local_fallback() + f"\n\n*(API Error: {str(e)})*"
 
+# Streaming variant for the Streamlit UI: yields text chunks as Gemini produces them.
+# Shares the plan cache, so a cache hit is yielded in one piece and a completed stream is cached.
+def generate_action_plan_with_gemini_stream(
+    stats: Dict[str, Any],
+    model: str = "gemini-2.0-flash"
+) -> Iterator[str]:
+    """Streams the AI plan from Gemini 2.0 Flash."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+
+    if not api_key:
+        yield get_local_fallback()
+        return
+
+    try:
+        prompt = _build_prompt(stats)
+        cache_key = (_fuzzy_key(stats), model)
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        client = genai.Client(api_key=api_key)
+        parts = []
+        for chunk in client.models.generate_content_stream(model=model, contents=prompt, config=_generation_config()):
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+        if parts:
+            _cache_put(cache_key, "".join(parts))
+
+    except Exception as e:
+        print(f"[Gemini Error] {e}")
+        yield "\n\n" + get_local_fallback() + f"\n\n*(API Error: {str(e)})*"
+
 def get_local_fallback():
     return ("**[AI Summary: Local Fallback]** Gemini key not detected or API failed. \n\n"
             "**Priority Actions:**\n"
@@ -3,35 +3,69 @@
 import re
 from datetime import timedelta
 from typing import Tuple, Optional, List, Dict, Any
+import numpy as np
 import pandas as pd
-from dateutil.parser import parse
 from rapidfuzz import fuzz, process
+from recon._numba_kernels import amount_date_filter
 
 # --- Helpers ---
 REF_PATTERNS = [r'\b[A-Z]{2,}-\d{1,}\b', r'\b[A-Z]{2,}\d{2,}\b']
 NOISE_WORDS_RE = re.compile(r'\b(payment|eft|incoming|debit order|txn|ref:|paid)\b', flags=re.I)
+# Compiled once at import. One pattern per REF_PATTERNS entry (with a capture group for str.extract),
+# tried in priority order -- not a single alternation, which would return the leftmost match of any pattern.
+_REF_RES = [re.compile(f'({p})') for p in REF_PATTERNS]
+_NON_ALNUM_RE = re.compile(r'[^A-Za-z0-9\s]')
+_WS_RE = re.compile(r'\s+')
+FUZZY_SCORE_CUTOFF = 85
+DATE_WINDOW_DAYS = 5
 
 def safe_float(x):
     try: return float(x) if pd.notna(x) else None
     except: return None
 
-def _to_date(s):
-    try: return parse(str(s)).date() if pd.notna(s) else None
-    except: return None
-
 def extract_reference(text: str) -> str:
     if not text: return ''
     txt = str(text).upper()
-    for p in REF_PATTERNS:
-        m = re.search(p, txt)
+    for pattern in _REF_RES:
+        m = pattern.search(txt)
         if m: return m.group(0)
     return ''
 
 def normalize_text(s: str) -> str:
     if not s: return ''
     s = NOISE_WORDS_RE.sub(' ', str(s))
-    s = re.sub(r'[^A-Za-z0-9\s]', ' ', s).lower()
-    return re.sub(r'\s+', ' ', s).strip()
+    s = _NON_ALNUM_RE.sub(' ', s).lower()
+    return _WS_RE.sub(' ', s).strip()
+
+def _to_dates(s: pd.Series) -> pd.Series:
+    """Vectorized date parsing; unparseable values become NaT."""
+    # Fast path for ISO dates (the SA bank export format); only the leftovers go through mixed-format parsing
+    parsed = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce')
+    retry = parsed.isna() & s.notna()
+    if retry.any():
+        parsed = parsed.where(~retry, pd.to_datetime(s[retry], format='mixed', errors='coerce'))
+    return parsed.dt.date
+
+def _extract_reference_series(s: pd.Series) -> pd.Series:
+    """Series version of extract_reference: earlier patterns win, later ones only fill rows still without a ref."""
+    txt = s.fillna('').astype(str).str.upper()
+    out = txt.str.extract(_REF_RES[0], expand=False)
+    for pattern in _REF_RES[1:]:
+        out = out.where(out.notna(), txt.str.extract(pattern, expand=False))
+    return out.fillna('')
+
+def _normalize_text_series(s: pd.Series) -> pd.Series:
+    """Series version of normalize_text."""
+    return (s.fillna('').astype(str)
+             .str.replace(NOISE_WORDS_RE, ' ', regex=True)
+             .str.replace(_NON_ALNUM_RE, ' ', regex=True)
+             .str.lower()
+             .str.replace(_WS_RE, ' ', regex=True)
+             .str.strip())
+
+def _to_days(s: pd.Series) -> np.ndarray:
+    """Days since epoch as floats (NaN for missing dates), for numeric date-window checks."""
+    return (pd.to_datetime(s, errors='coerce') - pd.Timestamp(0)).dt.days.to_numpy(dtype=float, na_value=np.nan)
 
 def _ensure_cols(df: pd.DataFrame, cols: List[str]):
     """Safely adds missing columns with None values."""
@@ -69,57 +103,131 @@ def preprocess(bank_df: pd.DataFrame, inv_df: pd.DataFrame):
     _ensure_cols(inv, ['invoice_id', 'customer', 'amount', 'due_date', 'reference'])
     
     # 4. Type Conversions
-    bank['date'] = bank['date'].apply(_to_date)
-    inv['due_date'] = inv['due_date'].apply(_to_date)
+    bank['date'] = _to_dates(bank['date'])
+    inv['due_date'] = _to_dates(inv['due_date'])
     if 'issue_date' not in inv.columns: inv['issue_date'] = inv['due_date']
     
     bank['amount'] = pd.to_numeric(bank['amount'], errors='coerce')
     inv['amount'] = pd.to_numeric(inv['amount'], errors='coerce')
     
     # 5. Helper columns for matching
-    bank['_extracted_ref'] = bank['description'].fillna('').astype(str).apply(extract_reference)
+    bank['_extracted_ref'] = _extract_reference_series(bank['description'])
     
     # If extracted ref is empty try to extract from the reference column as well (some banks put it there)
-    bank['_extracted_ref'] = bank['_extracted_ref'].replace('', pd.NA).fillna(
-        bank['reference'].fillna('').astype(str).apply(extract_reference)
-    ).fillna('')
+    bank['_extracted_ref'] = bank['_extracted_ref'].where(
+        bank['_extracted_ref'] != '', _extract_reference_series(bank['reference'])
+    )
+
+    bank['_norm_text'] = _normalize_text_series(bank['description'].fillna('') + ' ' + bank['reference'].fillna(''))
+    inv['_norm_customer'] = _normalize_text_series(inv['customer'])
 
-    bank['_norm_text'] = (bank['description'].fillna('') + ' ' + bank['reference'].fillna('')).astype(str).apply(normalize_text)
-    inv['_norm_customer'] = inv['customer'].fillna('').astype(str).apply(normalize_text)
+    # 6. Arrow-backed strings: compact storage and C-level comparisons in the merge/str ops downstream
+    for col in ['_extracted_ref', '_norm_text', 'reference', 'description']:
+        bank[col] = bank[col].astype('string[pyarrow]')
+    for col in ['_norm_customer', 'reference', 'customer']:
+        inv[col] = inv[col].astype('string[pyarrow]')
     
     return bank, inv
 
+def _combine_pairs(bank: pd.DataFrame, inv: pd.DataFrame, pairs: pd.DataFrame, match_type: str) -> pd.DataFrame:
+    """Builds match rows for (_bi, _ii) label pairs. Invoice values win on shared columns (amount, reference)."""
+    rows = bank.loc[pairs['_bi']].reset_index(drop=True)
+    inv_part = inv.loc[pairs['_ii']].reset_index(drop=True)
+    rows[inv_part.columns] = inv_part
+    rows['match_type'] = match_type
+    return rows
+
+def _score_block(bank: pd.DataFrame, inv: pd.DataFrame) -> pd.DataFrame:
+    """Filters the block's bank x invoice pairs on amount and date, then fuzzy-scores only the survivors in one cpdist call."""
+    # Empty strings can never reach the cutoff, so drop them before scoring
+    bank = bank[bank['_norm_text'].fillna('') != '']
+    inv = inv[inv['_norm_customer'].fillna('') != '']
+    if bank.empty or inv.empty:
+        return pd.DataFrame(columns=['_bi', '_ii', 'score'])
+
+    # Cheap numeric filter first, over every pair in the block, so the fuzzy scorer never sees impossible pairs
+    rows, cols = (a.ravel() for a in np.indices((len(bank), len(inv))))
+    ok = amount_date_filter(
+        bank['amount'].to_numpy(dtype=float, na_value=np.nan), inv['amount'].to_numpy(dtype=float, na_value=np.nan),
+        _to_days(bank['date']), _to_days(inv['due_date']),
+        np.column_stack((rows, cols)), tol=0.05, window=DATE_WINDOW_DAYS
+    )
+    rows, cols = rows[ok], cols[ok]
+    if len(rows) == 0:
+        return pd.DataFrame(columns=['_bi', '_ii', 'score'])
+
+    # score_cutoff lets rapidfuzz exit early on pairs its bounds prove can't reach the cutoff. No length-ratio
+    # prefilter on top: token_set_ratio scores a name contained in a longer bank description as 100.
+    names = bank['_norm_text'].to_numpy(dtype=object)
+    customers = inv['_norm_customer'].to_numpy(dtype=object)
+    scores = process.cpdist(
+        names[rows].tolist(), customers[cols].tolist(),
+        scorer=fuzz.token_set_ratio, score_cutoff=FUZZY_SCORE_CUTOFF, workers=-1, dtype=np.uint8
+    )
+    hit = scores > 0
+    return pd.DataFrame({
+        '_bi': bank.index[rows[hit]],
+        '_ii': inv.index[cols[hit]],
+        'score': scores[hit],
+    })
+
+def _greedy_one_to_one(cand: pd.DataFrame) -> pd.DataFrame:
+    """Greedy 1:1 assignment: walk candidates best score first, keeping a pair only if neither side is taken yet."""
+    cand = cand.sort_values('score', ascending=False, kind='stable')
+    used_b, used_i, keep = set(), set(), []
+    for pos, (bi, ii) in enumerate(zip(cand['_bi'], cand['_ii'])):
+        if bi in used_b or ii in used_i:
+            continue
+        used_b.add(bi)
+        used_i.add(ii)
+        keep.append(pos)
+    return cand.iloc[keep]
+
+def _fuzzy_name_pairs(bank: pd.DataFrame, inv: pd.DataFrame) -> pd.DataFrame:
+    """Blocks candidates by rounded amount, fuzzy-scores within each block and keeps 1:1 pairs."""
+    empty = pd.DataFrame(columns=['_bi', '_ii', 'score'])
+    if bank.empty or inv.empty:
+        return empty
+
+    # A match needs amounts within 0.05, so rounded amounts can differ by at most 1 (e.g. 100.49 vs 100.52).
+    # Each bank block is scored against invoice blocks k-1, k and k+1: the blocker only prunes, never drops a pair.
+    bank_groups = bank.groupby(bank['amount'].round(0).astype('Int64')).groups
+    inv_groups = inv.groupby(inv['amount'].round(0).astype('Int64')).groups
+    blocks = []
+    for k in sorted(bank_groups.keys()):
+        near = [inv_groups[n] for n in (k - 1, k, k + 1) if n in inv_groups]
+        if near:
+            blocks.append(_score_block(bank.loc[bank_groups[k]], inv.loc[near[0].append(near[1:])]))
+    blocks = [b for b in blocks if not b.empty]
+    if not blocks:
+        return empty
+    cand = pd.concat(blocks, ignore_index=True)
+
+    return _greedy_one_to_one(cand)
+
 def match(bank_df, inv_df) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Dict]:
     bank, inv = preprocess(bank_df, inv_df)
     
-    unmatched_txns_idx = set(bank.index)
-    unmatched_inv_idx = set(inv.index)
-    results = []
-    
-    bank_amts = bank['amount'].to_dict()
-    inv_amts = inv['amount'].to_dict()
-    
     # 1. Exact Ref + Amount
-    inv_by_ref = {str(r).strip().upper(): i for i, r in inv['reference'].items() if pd.notna(r)}
-    
-    for bi in list(unmatched_txns_idx):
-        ref = bank.at[bi, '_extracted_ref']
-        if ref in inv_by_ref:
-            ii = inv_by_ref[ref]
-            # Floating point comparison safety
-            if ii in unmatched_inv_idx:
-                b_amt = bank_amts.get(bi)
-                i_amt = inv_amts.get(ii)
-                if b_amt is not None and i_amt is not None and abs(b_amt - i_amt) < 0.05:
-                    results.append({**bank.loc[bi].to_dict(), **inv.loc[ii].to_dict(), 'match_type': 'exact_ref'})
-                    unmatched_txns_idx.discard(bi)
-                    unmatched_inv_idx.discard(ii)
+    # Equi-join on the reference, then keep pairs whose amounts agree (floating point comparison safety).
+    # Row labels are carried through so duplicate ids in the source files can't collide.
+    inv_ref = inv['reference'].fillna('').str.strip().str.upper()
+    merged = bank[['_extracted_ref', 'amount']].rename_axis('_bi').reset_index().merge(
+        inv[['amount']].assign(_ref_upper=inv_ref).rename_axis('_ii').reset_index(),
+        left_on='_extracted_ref', right_on='_ref_upper', suffixes=('_b', '_i')
+    )
+    ok = (merged['amount_b'].sub(merged['amount_i']).abs() < 0.05) & merged['_extracted_ref'].ne('')
+    pairs = merged[ok].drop_duplicates(subset='_bi', keep='first').drop_duplicates(subset='_ii', keep='first')
+
+    exact = _combine_pairs(bank, inv, pairs, 'exact_ref')
                 
-    # 2. Amount + Fuzzy Name (Placeholder / simplified)
+    # 2. Amount + Fuzzy Name (only over what the exact step left behind)
+    fuzzy_pairs = _fuzzy_name_pairs(bank[~bank.index.isin(pairs['_bi'])], inv[~inv.index.isin(pairs['_ii'])])
+    fuzzy = _combine_pairs(bank, inv, fuzzy_pairs, 'fuzzy_name')
     
-    matches = pd.DataFrame(results)
-    unmatched_txns = bank.loc[sorted(unmatched_txns_idx)] if unmatched_txns_idx else pd.DataFrame(columns=bank.columns)
-    unmatched_invs = inv.loc[sorted(unmatched_inv_idx)] if unmatched_inv_idx else pd.DataFrame(columns=inv.columns)
+    matches = pd.concat([exact, fuzzy], ignore_index=True) if not fuzzy.empty else exact
+    unmatched_txns = bank[~bank.index.isin(pairs['_bi']) & ~bank.index.isin(fuzzy_pairs['_bi'])]
+    unmatched_invs = inv[~inv.index.isin(pairs['_ii']) & ~inv.index.isin(fuzzy_pairs['_ii'])]
     
     findings = {'duplicate_txn': pd.DataFrame(), 'partials': []}
     
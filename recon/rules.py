@@ -1,21 +1,39 @@
 # recon/rules.py
 
+import numpy as np
 import pandas as pd
-from typing import Dict
+from typing import Dict, Any, Optional
 
-def compute_findings(matches: pd.DataFrame, bank_unmatched: pd.DataFrame, inv_unmatched: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+def compute_findings(matches: pd.DataFrame, bank_unmatched: pd.DataFrame, inv_unmatched: pd.DataFrame,
+                     fuzzy_findings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     findings = {}
 
     # Rule 1: Duplicates (Same amount & date)
     if not bank_unmatched.empty and {'amount', 'date'}.issubset(bank_unmatched.columns):
-        dup_mask = bank_unmatched.duplicated(subset=['amount', 'date'], keep=False)
-        findings['duplicate_txn'] = bank_unmatched[dup_mask].copy().reset_index(drop=True)
+        # Hash-based group sizes; dup_count tells the report how many copies were seen
+        sizes = bank_unmatched.groupby(['amount', 'date'], dropna=False)['amount'].transform('size')
+        dup_mask = sizes > 1
+        findings['duplicate_txn'] = bank_unmatched.loc[dup_mask].assign(dup_count=sizes[dup_mask]).reset_index(drop=True)
     else:
         findings['duplicate_txn'] = pd.DataFrame()
 
     # Rule 2: High Value Unmatched
     if not bank_unmatched.empty and 'amount' in bank_unmatched.columns:
-        threshold = bank_unmatched['amount'].quantile(0.90)
-        findings['high_value_unmatched'] = bank_unmatched[bank_unmatched['amount'] >= threshold].copy().reset_index(drop=True)
-        
-    return findings
\ No newline at end of file
+        # 90th percentile via np.partition (O(N) selection instead of a full sort), same linear interpolation as Series.quantile
+        amounts = bank_unmatched['amount'].to_numpy(dtype=float, na_value=np.nan)
+        valid = amounts[~np.isnan(amounts)]
+        if valid.size:
+            pos = 0.90 * (valid.size - 1)
+            lo, hi = int(pos), min(int(pos) + 1, valid.size - 1)
+            part = np.partition(valid, [lo, hi])
+            threshold = part[lo] + (part[hi] - part[lo]) * (pos - lo)
+            high_mask = amounts >= threshold
+        else:
+            high_mask = np.zeros(len(amounts), dtype=bool)
+        findings['high_value_unmatched'] = bank_unmatched[high_mask].copy().reset_index(drop=True)
+
+    # Merge with the matcher's findings: those win, unless they came back as an empty DataFrame
+    # and a strict rule produced the same key
+    fuzzy_findings = fuzzy_findings or {}
+    return {**findings, **{k: v for k, v in fuzzy_findings.items()
+                           if k not in findings or not (isinstance(v, pd.DataFrame) and v.empty)}}
\ No newline at end of file
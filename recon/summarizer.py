@@ -1,17 +1,16 @@
 # recon/summarizer.py
 
 import pandas as pd
-from typing import Dict, Any
-from recon.llm_gemini import generate_action_plan_with_gemini
+from typing import Dict, Any, Iterator
+from recon.llm_gemini import generate_action_plan_with_gemini, generate_action_plan_with_gemini_stream
 
 # Summarizer: Takes raw stats and findings, formats them, and generates a summary action plan using Gemini.
-def _to_markdown_safe(df, max_rows=3):
-    if df.empty: return "(no samples)"
-    try: return df.head(max_rows).to_markdown(index=False)
-    except: return df.head(max_rows).to_csv(index=False)
+# CSV rather than markdown: Gemini reads both equally well, and CSV is faster and needs no tabulate.
+def _to_csv_sample(df, max_rows=3):
+    return df.head(max_rows).to_csv(index=False) if not df.empty else "(no samples)"
 
 # Transforms the raw stats and findings into a structured format that Gemini can understand.
-# It preserves the original data in a 'raw' key for potential future use, while also creating a 'counts' summary and markdown samples for the prompt.
+# It preserves the original data in a 'raw' key for potential future use, while also creating a 'counts' summary and CSV samples for the prompt.
 def generate_stats_from_inputs(raw_stats):
     findings = raw_stats.get("findings", {})
     un_txns = raw_stats.get("unmatched_txns", pd.DataFrame())
@@ -25,8 +24,8 @@ def generate_stats_from_inputs(raw_stats):
             "dup_txn": len(findings.get("duplicate_txn", []))
         },
         "mismatch_samples": {
-            "txns": _to_markdown_safe(un_txns),
-            "invs": _to_markdown_safe(un_invs)
+            "txns": _to_csv_sample(un_txns),
+            "invs": _to_csv_sample(un_invs)
         },
         "raw": raw_stats
     }
@@ -39,4 +38,11 @@ def summarize_report(stats: Dict[str, Any]) -> str:
         stats = generate_stats_from_inputs(stats)
     
     # Call Gemini
-    return generate_action_plan_with_gemini(stats)
\ No newline at end of file
+    return generate_action_plan_with_gemini(stats)
+
+# Streaming version of summarize_report, for UIs that can render partial text.
+def summarize_report_stream(stats: Dict[str, Any]) -> Iterator[str]:
+    if "mismatch_samples" not in stats:
+        stats = generate_stats_from_inputs(stats)
+    
+    return generate_action_plan_with_gemini_stream(stats)
\ No newline at end of file
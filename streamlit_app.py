@@ -1,5 +1,6 @@
 #stremlit_app.py
 
+import io
 import os
 import sys
 import traceback
@@ -19,7 +20,7 @@ if str(PROJECT_ROOT) not in sys.path:
 # Import local modules
 from recon.matcher import match
 from recon.rules import compute_findings
-from recon.summarizer import summarize_report
+from recon.summarizer import summarize_report_stream
 from recon.integrators import publish_recon_report
 
 st.set_page_config(
@@ -29,6 +30,33 @@ st.set_page_config(
 )
 
 # --- Helper Functions ---
+# Both caches are keyed on the raw upload bytes, which Streamlit hashes cheaply,
+# so re-running with unchanged files skips parsing and matching entirely.
+@st.cache_data(show_spinner=False)
+def read_inputs(bank_bytes: bytes, inv_bytes: bytes):
+    bank_df = pd.read_csv(io.BytesIO(bank_bytes), engine="pyarrow")
+    inv_df = pd.read_csv(io.BytesIO(inv_bytes), engine="pyarrow")
+    return bank_df, inv_df
+
+@st.cache_data(show_spinner=False)
+def run_pipeline(bank_bytes: bytes, inv_bytes: bytes) -> dict:
+    bank_df, inv_df = read_inputs(bank_bytes, inv_bytes)
+
+    # 1. Fuzzy Matching (Core Logic)
+    # match returns: matches, unmatched_txns, unmatched_invs, findings(fuzzy)
+    m, un_txns, un_invs, findings = match(bank_df, inv_df)
+
+    # 2. Strict Rules Merge (CRITICAL FIX)
+    # We calculate strict rules (like exact duplicates) and merge them in
+    findings = compute_findings(m, un_txns, un_invs, findings)
+
+    return {
+        "matches": m,
+        "unmatched_txns": un_txns,
+        "unmatched_invs": un_invs,
+        "findings": findings
+    }
+
 def df_download_button(df, filename, label="Download CSV"):
     if df.empty:
         return
@@ -86,13 +114,14 @@ with col2:
 # --- Session State Management ---
 if "results" not in st.session_state:
     st.session_state.results = None
+if "publish_futures" not in st.session_state:
+    st.session_state.publish_futures = []
 
 # --- Execution Logic ---
 if bank_file and inv_file:
     # Read files into DataFrames
     try:
-        bank_df = pd.read_csv(bank_file)
-        inv_df = pd.read_csv(inv_file)
+        bank_df, inv_df = read_inputs(bank_file.getvalue(), inv_file.getvalue())
         st.success(f"Loaded {len(bank_df)} transactions and {len(inv_df)} expected payments.")
     except Exception as e:
         st.error(f"Error reading CSV files: {e}")
@@ -102,44 +131,30 @@ if bank_file and inv_file:
     if st.button("Run Reconciliation", type="primary", use_container_width=True):
         with st.spinner("AI is analyzing payments, matching records, and writing the report..."):
             try:
-                # 1. Fuzzy Matching (Core Logic)
-                # match returns: matches, unmatched_txns, unmatched_invs, findings(fuzzy)
-                m, un_txns, un_invs, findings = match(bank_df, inv_df)
+                # 1-2. Matching + strict rules (cached on the uploaded file contents)
+                results = run_pipeline(bank_file.getvalue(), inv_file.getvalue())
+                findings = results["findings"]
 
-                # 2. Strict Rules Merge (CRITICAL FIX)
-                # We calculate strict rules (like exact duplicates) and merge them in
-                strict_findings = compute_findings(m, un_txns, un_invs)
-                
-                for k, v in strict_findings.items():
-                    # If the finding key is missing, or if the fuzzy finding was empty, use strict rule
-                    existing = findings.get(k)
-                    if k not in findings:
-                        findings[k] = v
-                    elif isinstance(existing, pd.DataFrame) and existing.empty and not v.empty:
-                        findings[k] = v
-
-                # 3. Generate AI Summary
+                # 3. Generate AI Summary (repeat runs are served from the Gemini plan cache)
                 stats = {
                     "counts": {
-                        "matches": len(m),
-                        "unmatched_txn": len(un_txns),
-                        "unmatched_inv": len(un_invs),
+                        "matches": len(results["matches"]),
+                        "unmatched_txn": len(results["unmatched_txns"]),
+                        "unmatched_inv": len(results["unmatched_invs"]),
                         "dup_txn": len(findings.get('duplicate_txn', []))
                     },
-                    "unmatched_txns": un_txns,
-                    "unmatched_invs": un_invs,
+                    "unmatched_txns": results["unmatched_txns"],
+                    "unmatched_invs": results["unmatched_invs"],
                     "findings": findings
                 }
-                summary_text = summarize_report(stats)
+                # Stream the plan into a temporary slot; the results section below renders the final text
+                stream_slot = st.empty()
+                with stream_slot.container():
+                    summary_text = st.write_stream(summarize_report_stream(stats))
+                stream_slot.empty()
 
                 # Save to Session State (so UI doesn't disappear)
-                st.session_state.results = {
-                    "matches": m,
-                    "unmatched_txns": un_txns,
-                    "unmatched_invs": un_invs,
-                    "findings": findings,
-                    "summary": summary_text
-                }
+                st.session_state.results = {**results, "summary": summary_text}
                 
             except Exception as e:
                 st.error("Reconciliation failed! See details below.")
@@ -211,16 +226,22 @@ if st.session_state.results:
     st.markdown("---")
     st.subheader("Publish Report")
     
+    # Publishing runs in the background; report any failures from the previous click on this re-render
+    pending = []
+    for f in st.session_state.publish_futures:
+        if not f.done():
+            pending.append(f)
+        elif f.exception() is not None:
+            st.error(f"Publishing failed: {f.exception()}")
+    st.session_state.publish_futures = pending
+    
     col_pub1, col_pub2 = st.columns([1, 4])
     with col_pub1:
         if st.button("Send to Slack/Notion"):
-            try:
-                publish_recon_report(
-                    res["matches"], 
-                    res["unmatched_txns"], 
-                    res["unmatched_invs"], 
-                    res["summary"]
-                )
-                st.toast("Report published successfully!", icon="✅")
-            except Exception as e:
-                st.error(f"Publishing failed: {e}")
\ No newline at end of file
+            st.session_state.publish_futures += publish_recon_report(
+                res["matches"], 
+                res["unmatched_txns"], 
+                res["unmatched_invs"], 
+                res["summary"]
+            )
+            st.toast("Publishing report in the background...", icon="✅")
\ No newline at end of file